@@ -1,64 +1,508 @@
+import asyncio
+import functools
 import os
-import json
+import re
+import sys
+import threading
+import orjson
 import yfinance as yf
+from cachetools import TTLCache
+from yfinance.data import YfData
 from mcp.server.fastmcp import FastMCP
 
+INSTRUCTIONS = (
+    "Free global stock data tools powered by Yahoo Finance. "
+    "Use these tools to get financial statements, key metrics, "
+    "ratios, dividends, and quotes for any publicly traded company globally.\n\n"
+    "Ticker format examples:\n"
+    "- US: 'AAPL', 'MSFT', 'COP'\n"
+    "- Japan: '8766.T' (Tokio Marine), '4063.T' (Shin-Etsu), '8001.T' (ITOCHU)\n"
+    "- Swiss/Liechtenstein: 'LLBN.SW' (LLB), 'NESN.SW' (Nestle)\n"
+    "- Singapore: 'D05.SI' (DBS), 'O39.SI' (OCBC)\n"
+    "- UK: 'GSK.L' (GSK), 'AZN.L' (AstraZeneca)\n"
+    "- Australia: 'BHP.AX' (BHP), 'CBA.AX' (CommBank)\n"
+    "- Germany: 'SAP.DE' (SAP)\n"
+    "- France: 'SAN.PA' (Sanofi)\n"
+    "- Hong Kong: '0005.HK' (HSBC)\n"
+)
+
 # Initialize MCP server
 mcp = FastMCP(
     "Stock Data",
     host="0.0.0.0",
     port=int(os.environ.get("PORT", 8000)),
-    instructions=(
-        "Free global stock data tools powered by Yahoo Finance. "
-        "Use these tools to get financial statements, key metrics, "
-        "ratios, dividends, and quotes for any publicly traded company globally.\n\n"
-        "Ticker format examples:\n"
-        "- US: 'AAPL', 'MSFT', 'COP'\n"
-        "- Japan: '8766.T' (Tokio Marine), '4063.T' (Shin-Etsu), '8001.T' (ITOCHU)\n"
-        "- Swiss/Liechtenstein: 'LLBN.SW' (LLB), 'NESN.SW' (Nestle)\n"
-        "- Singapore: 'D05.SI' (DBS), 'O39.SI' (OCBC)\n"
-        "- UK: 'GSK.L' (GSK), 'AZN.L' (AstraZeneca)\n"
-        "- Australia: 'BHP.AX' (BHP), 'CBA.AX' (CommBank)\n"
-        "- Germany: 'SAP.DE' (SAP)\n"
-        "- France: 'SAN.PA' (Sanofi)\n"
-        "- Hong Kong: '0005.HK' (HSBC)\n"
-    ),
+    instructions=INSTRUCTIONS,
 )
 
 
+def to_json(data, pretty: bool = False) -> str:
+    """Serialize data to JSON, compact unless pretty is set.
+
+    Tool results are read by the model, not a person, so whitespace only
+    costs bytes and context tokens.
+
+    numpy scalars from pandas frames are encoded natively (NaN becomes null);
+    anything else orjson can't handle, such as Timestamps, falls back to str().
+    """
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if pretty:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(data, default=str, option=option).decode()
+
+
+NO_DATA_ERROR = to_json({"error": "No data returned"})
+
+
 def safe_json(data) -> str:
     """Convert data to JSON, handling NaN and other non-serializable values."""
     if data is None:
-        return json.dumps({"error": "No data returned"})
+        return NO_DATA_ERROR
     if hasattr(data, "to_dict"):
         data = data.to_dict()
-    return json.dumps(data, indent=2, default=str)
+    return to_json(data)
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_symbol(symbol: str) -> str:
+    """Canonicalize a ticker (' aapl' -> 'AAPL') so cache keys line up.
+
+    The result is interned, so repeat lookups of the same ticker hash and
+    compare by identity.
+    """
+    return sys.intern(symbol.strip().upper())
+
+
+def parse_symbols(symbols: str, limit: int = 10) -> list[str]:
+    """Split a comma-separated ticker list into normalized, unique symbols.
+
+    Blank entries are dropped, order of first appearance is kept, and at
+    most `limit` symbols are returned.
+    """
+    parsed = (normalize_symbol(s) for s in symbols.split(",") if s.strip())
+    return list(dict.fromkeys(parsed))[:limit]
+
+
+# Yahoo exchange suffixes ('8766.T', 'NESN.SW', 'ESZ24.CME'); US listings
+# have none. Not exhaustive, so only used to hint at a typo when Yahoo has
+# no data for a ticker; unknown suffixes are still looked up.
+EXCHANGE_SUFFIXES = frozenset({
+    "AS", "AT", "AX", "BA", "BC", "BD", "BE", "BK", "BM", "BO", "BR", "CA",
+    "CBT", "CME", "CMX", "CN", "CO", "CR", "DE", "DU", "F", "HA", "HE", "HK",
+    "HM", "IC", "IL", "IR", "IS", "JK", "JO", "KL", "KQ", "KS", "KW", "L",
+    "LS", "MC", "ME", "MI", "MU", "MX", "NE", "NS", "NYB", "NYM", "NZ", "OL",
+    "PA", "PR", "QA", "RG", "SA", "SG", "SI", "SN", "SR", "SS", "ST", "SW",
+    "SZ", "T", "TA", "TI", "TL", "TO", "TW", "TWO", "V", "VI", "VS", "WA",
+})
+
+# Shape of a Yahoo ticker after normalize_symbol(): 'AAPL', 'BRK-B', '^N225',
+# 'GC=F', '0005.HK', 'AAPL250117C00150000'. Only the characters are checked,
+# not the length, so long option symbols get through.
+SYMBOL_PATTERN = re.compile(r"[A-Z0-9^][A-Z0-9&=^-]*(\.[A-Z]{1,3})?")
+
+
+def validate_symbol(symbol: str) -> str | None:
+    """Return an error message if symbol can't be a Yahoo ticker, else None.
+
+    Catches malformed input before yfinance spends seconds probing Yahoo
+    for a ticker that can't exist.
+    """
+    if not SYMBOL_PATTERN.fullmatch(symbol):
+        return f"Invalid ticker symbol '{symbol}'."
+    return None
+
+
+# Yahoo responses are cached in-process so repeated tool calls for the same
+# symbol skip the network. .info and price history move intraday, so they
+# expire after five minutes; statements and dividends change at most daily.
+live_cache = TTLCache(maxsize=1024, ttl=5 * 60)
+daily_cache = TTLCache(maxsize=1024, ttl=24 * 60 * 60)
+# Error results (mistyped or delisted tickers) are kept briefly, keyed by
+# (fetch, args), so clients retrying a bad lookup don't pay yfinance's slow
+# failure path every time.
+error_cache = TTLCache(maxsize=1024, ttl=60)
+
+
+# Caps concurrent yfinance calls so fan-out tools like get_full_financials
+# don't trip Yahoo's rate limiting.
+yahoo_slots = asyncio.Semaphore(8)
+
+
+# yf.Ticker handles, shared across tools. A Ticker memoizes whatever it has
+# fetched, so handles expire well before the data caches above; a refetch
+# after a cache entry expires then always goes through a fresh handle.
+ticker_handles = TTLCache(maxsize=512, ttl=60)
+ticker_handles_lock = threading.Lock()
+
+
+def get_ticker(symbol: str) -> yf.Ticker:
+    """Return a yf.Ticker for symbol, reusing a recent handle when there is one."""
+    # Called from worker threads, and TTLCache is not thread-safe.
+    with ticker_handles_lock:
+        t = ticker_handles.get(symbol)
+        if t is None:
+            t = ticker_handles[symbol] = yf.Ticker(symbol)
+        return t
+
+
+def drop_ticker_on_failure(fetch):
+    """Evict symbol's Ticker handle when fetch(symbol, ...) fails or finds nothing.
+
+    yfinance marks data as fetched before requesting it and memoizes the
+    empty result of a failed request, so a reused handle would keep
+    answering "no data" without asking Yahoo again.
+    """
+    @functools.wraps(fetch)
+    def wrapper(symbol: str, *args):
+        data = None
+        try:
+            data = fetch(symbol, *args)
+            return data
+        finally:
+            if not data or isinstance(data, dict) and "error" in data:
+                with ticker_handles_lock:
+                    ticker_handles.pop(symbol, None)
+    return wrapper
+
+
+# Deadline for one blocking yfinance call, which may make several requests.
+BLOCKING_TIMEOUT = 30
+
+
+def release_slot(task: asyncio.Future) -> None:
+    """Free the yahoo_slots slot held by a finished run_blocking() thread."""
+    yahoo_slots.release()
+    # Mark a late failure as seen; the caller may have timed out already.
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_blocking(fn, *args):
+    """Run a blocking yfinance call in a worker thread, bounded by yahoo_slots.
+
+    Raises TimeoutError after BLOCKING_TIMEOUT seconds. The worker thread
+    can't be interrupted, so it finishes in the background and keeps its
+    slot until then; a slow Yahoo never sees more than the capped number
+    of requests.
+    """
+    await yahoo_slots.acquire()
+    try:
+        task = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+    except BaseException:
+        yahoo_slots.release()
+        raise
+    task.add_done_callback(release_slot)
+    try:
+        # Shielded so a timeout or cancelled caller leaves the task, and its
+        # slot, alive until the thread returns.
+        return await asyncio.wait_for(asyncio.shield(task), BLOCKING_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Yahoo did not respond within {BLOCKING_TIMEOUT}s") from None
+
+
+# Fetches currently running, keyed by (fetch, args), so concurrent misses for
+# the same data share one upstream call instead of each hitting Yahoo.
+in_flight: dict[tuple, asyncio.Future] = {}
+
+
+async def fetch_once(fetch, *args):
+    """Run fetch(*args) via run_blocking, joining an identical call already in flight."""
+    key = (fetch, args)
+    future = in_flight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(run_blocking(fetch, *args))
+        in_flight[key] = future
+        future.add_done_callback(lambda _: in_flight.pop(key, None))
+    # Shielded so one caller giving up doesn't cancel the fetch for the others.
+    return await asyncio.shield(future)
 
 
-def ticker_info(symbol: str) -> dict:
+async def cached(cache: TTLCache, key, fetch, *args):
+    """Return cache[key], running fetch(*args) in a worker thread on a miss.
+
+    Error results go to error_cache for a minute instead; empty results
+    and exceptions are not stored, so they are retried on the next call.
+    """
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    error = error_cache.get((fetch, args))
+    if error is not None:
+        return error
+    data = await fetch_once(fetch, *args)
+    if isinstance(data, dict) and "error" in data:
+        error_cache[(fetch, args)] = data
+    elif data:
+        cache[key] = data
+    return data
+
+
+def fetch_json(fetch, *args) -> str | None:
+    """Call fetch(*args) and serialize the result, or return None if it is empty."""
+    data = fetch(*args)
+    return to_json(data) if data else None
+
+
+async def cached_json(cache: TTLCache, key, fetch, *args) -> str | None:
+    """Like cached(), but store the serialized JSON so hits skip to_json().
+
+    Returns None, without caching, when fetch(*args) comes back empty.
+    """
+    text = cache.get(key)
+    if text is None:
+        text = await fetch_once(fetch_json, fetch, *args)
+        if text is not None:
+            cache[key] = text
+    return text
+
+
+@drop_ticker_on_failure
+def fetch_info(symbol: str) -> dict:
+    """Fetch ticker info from Yahoo, bypassing the cache.
+
+    Returns an error dict only for tickers Yahoo doesn't know; request
+    failures (rate limits, network errors) raise so they aren't cached.
+    """
+    t = get_ticker(symbol)
+    info = t.info
+    if not info or info.get("trailingPegRatio") is None and len(info) < 5:
+        _, dot, suffix = symbol.rpartition(".")
+        if dot and suffix not in EXCHANGE_SUFFIXES:
+            return {"error": f"No data found for {symbol}; '.{suffix}' is not a known "
+                             "exchange suffix. Check the ticker symbol."}
+        return {"error": f"No data found for {symbol}. Check the ticker symbol."}
+    return info
+
+
+async def ticker_info(symbol: str) -> dict:
     """Get ticker info with error handling."""
+    error = validate_symbol(symbol)
+    if error:
+        return {"error": error}
     try:
-        t = yf.Ticker(symbol)
-        info = t.info
-        if not info or info.get("trailingPegRatio") is None and len(info) < 5:
-            return {"error": f"No data found for {symbol}. Check the ticker symbol."}
-        return info
+        return await cached(live_cache, symbol, fetch_info, symbol)
     except Exception as e:
         return {"error": f"Failed to fetch data for {symbol}: {str(e)}"}
 
 
+async def ticker_info_within(symbol: str, timeout: float) -> dict:
+    """ticker_info() with a deadline, reporting a timeout as an error."""
+    try:
+        return await asyncio.wait_for(ticker_info(symbol), timeout)
+    except asyncio.TimeoutError:
+        return {"error": f"Timed out fetching data for {symbol}"}
+
+
+@drop_ticker_on_failure
+def statement_data(symbol: str, attr: str) -> dict:
+    """Fetch a yfinance statement frame in columnar form.
+
+    values[i][j] is line item rows[i] for periods[j]. Each label appears
+    once instead of being repeated in every period, which keeps the JSON
+    small. Returns an empty dict when Yahoo has no data for the statement.
+    """
+    df = getattr(get_ticker(symbol), attr)
+    if df is None or df.empty:
+        return {}
+
+    return {
+        "symbol": symbol,
+        "periods": [col.strftime("%Y-%m-%d") for col in df.columns],
+        "rows": df.index.tolist(),
+        "values": df.astype(object).where(df.notna(), None).values.tolist(),
+    }
+
+
+@drop_ticker_on_failure
+def dividend_data(symbol: str) -> dict:
+    """Fetch the dividend payment history for a symbol.
+
+    Returns an empty dict when Yahoo reports no dividends.
+    """
+    divs = get_ticker(symbol).dividends
+
+    if divs is None or divs.empty:
+        return {}
+
+    dates = divs.index.strftime("%Y-%m-%d")
+    amounts = divs.round(6).tolist()
+    return {
+        "symbol": symbol,
+        "dividendCount": len(divs),
+        "dividends": [{"date": d, "amount": a} for d, a in zip(dates, amounts)]
+    }
+
+
+@drop_ticker_on_failure
+def price_history_data(symbol: str, period: str, interval: str) -> dict:
+    """Fetch OHLCV bars for a symbol.
+
+    Returns an empty dict when Yahoo has no history for the range.
+    """
+    hist = get_ticker(symbol).history(period=period, interval=interval)
+
+    if hist is None or hist.empty:
+        return {}
+
+    prices = hist[["Open", "High", "Low", "Close"]].round(4)
+    prices.columns = ["open", "high", "low", "close"]
+    prices.insert(0, "date", hist.index.strftime("%Y-%m-%d"))
+    prices["volume"] = hist["Volume"].astype("int64")
+    return {
+        "symbol": symbol,
+        "period": period,
+        "interval": interval,
+        "dataPoints": len(hist),
+        "prices": prices.to_dict(orient="records")
+    }
+
+
+@drop_ticker_on_failure
+def holders_data(symbol: str) -> dict:
+    """Fetch major, institutional and mutual fund holders for a symbol."""
+    t = get_ticker(symbol)
+    result = {"symbol": symbol}
+
+    # Major holders summary
+    mh = t.major_holders
+    if mh is not None and not mh.empty:
+        result["majorHolders"] = {}
+        for _, row in mh.iterrows():
+            result["majorHolders"][str(row.iloc[1])] = str(row.iloc[0])
+
+    # Top institutional holders
+    ih = t.institutional_holders
+    if ih is not None and not ih.empty:
+        result["topInstitutionalHolders"] = ih.head(10).to_dict(orient="records")
+
+    # Top mutual fund holders
+    mfh = t.mutualfund_holders
+    if mfh is not None and not mfh.empty:
+        result["topMutualFundHolders"] = mfh.head(10).to_dict(orient="records")
+
+    return result
+
+
+@drop_ticker_on_failure
+def recommendations_data(symbol: str) -> list[dict]:
+    """Fetch the 20 most recent analyst recommendation rows for a symbol."""
+    recs = get_ticker(symbol).recommendations
+    if recs is None or recs.empty:
+        return []
+    return recs.tail(20).to_dict(orient="records")
+
+
+# .info keys each tool passes through under their own name. Renamed fields
+# and text fields that default to "" are spelled out in the tools.
+PROFILE_KEYS = (
+    "marketCap", "beta", "trailingPE", "forwardPE", "dividendYield",
+    "dividendRate", "payoutRatio", "priceToBook", "enterpriseValue",
+    "profitMargins", "grossMargins", "operatingMargins", "returnOnEquity",
+    "returnOnAssets", "debtToEquity", "currentRatio", "quickRatio",
+    "freeCashflow", "operatingCashflow", "totalRevenue", "revenueGrowth",
+    "earningsGrowth", "targetMeanPrice", "recommendationKey",
+    "numberOfAnalystOpinions", "fiftyTwoWeekHigh", "fiftyTwoWeekLow",
+    "currentPrice", "sharesOutstanding", "floatShares", "heldPercentInsiders",
+    "heldPercentInstitutions", "shortRatio", "shortPercentOfFloat",
+)
+
+METRICS_KEYS = (
+    "currentPrice", "marketCap",
+    # Valuation
+    "trailingPE", "forwardPE", "pegRatio", "priceToBook",
+    "priceToSalesTrailing12Months", "enterpriseToRevenue",
+    "enterpriseToEbitda", "enterpriseValue", "trailingEps", "forwardEps",
+    # Profitability
+    "grossMargins", "operatingMargins", "profitMargins", "returnOnEquity",
+    "returnOnAssets",
+    # Balance sheet
+    "debtToEquity", "currentRatio", "quickRatio", "totalDebt", "totalCash",
+    "totalCashPerShare", "bookValue",
+    # Cash flow
+    "freeCashflow", "operatingCashflow",
+    # Dividends
+    "dividendYield", "dividendRate", "payoutRatio", "exDividendDate",
+    "lastDividendValue", "lastDividendDate", "fiveYearAvgDividendYield",
+    # Growth
+    "revenueGrowth", "earningsGrowth", "earningsQuarterlyGrowth",
+    "revenueQuarterlyGrowth",
+    # Revenue
+    "totalRevenue", "revenuePerShare",
+    # Risk
+    "beta", "shortRatio", "shortPercentOfFloat",
+    # Shares
+    "sharesOutstanding", "floatShares", "heldPercentInsiders",
+    "heldPercentInstitutions",
+    # Analyst
+    "targetMeanPrice", "targetHighPrice", "targetLowPrice",
+    "recommendationKey", "numberOfAnalystOpinions",
+)
+
+QUOTE_KEYS = (
+    "currentPrice", "previousClose", "open", "dayHigh", "dayLow", "volume",
+    "averageVolume", "marketCap", "trailingPE", "forwardPE", "trailingEps",
+    "dividendYield", "fiftyTwoWeekHigh", "fiftyTwoWeekLow", "fiftyDayAverage",
+    "twoHundredDayAverage", "sharesOutstanding",
+)
+
+COMPARE_KEYS = (
+    "currentPrice", "marketCap", "trailingPE", "forwardPE", "priceToBook",
+    "enterpriseToEbitda", "dividendYield", "payoutRatio", "grossMargins",
+    "operatingMargins", "profitMargins", "returnOnEquity", "returnOnAssets",
+    "debtToEquity", "currentRatio", "freeCashflow", "operatingCashflow",
+    "revenueGrowth", "earningsGrowth", "beta", "sharesOutstanding",
+)
+
+
+# Yahoo's multi-symbol quote endpoint, requested through yfinance's shared
+# session so its cookie/crumb handling applies. It takes ~20 symbols per call.
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+QUOTE_BATCH_SIZE = 20
+
+# (output key, Yahoo quote key) pairs, named to match get_stock_quote.
+BATCH_QUOTE_FIELDS = (
+    ("currency", "currency"),
+    ("currentPrice", "regularMarketPrice"),
+    ("previousClose", "regularMarketPreviousClose"),
+    ("open", "regularMarketOpen"),
+    ("dayHigh", "regularMarketDayHigh"),
+    ("dayLow", "regularMarketDayLow"),
+    ("volume", "regularMarketVolume"),
+    ("averageVolume", "averageDailyVolume3Month"),
+    ("marketCap", "marketCap"),
+    ("trailingPE", "trailingPE"),
+    ("forwardPE", "forwardPE"),
+    ("trailingEps", "epsTrailingTwelveMonths"),
+    ("dividendYield", "dividendYield"),
+    ("fiftyTwoWeekHigh", "fiftyTwoWeekHigh"),
+    ("fiftyTwoWeekLow", "fiftyTwoWeekLow"),
+    ("fiftyDayAverage", "fiftyDayAverage"),
+    ("twoHundredDayAverage", "twoHundredDayAverage"),
+    ("sharesOutstanding", "sharesOutstanding"),
+)
+
+
+def batch_quote_data(symbols: tuple[str, ...]) -> list[dict]:
+    """Fetch raw Yahoo quotes for up to QUOTE_BATCH_SIZE symbols in one request."""
+    params = {"symbols": ",".join(symbols), "formatted": "false"}
+    data = YfData().get_raw_json(QUOTE_URL, params=params)
+    return (data.get("quoteResponse") or {}).get("result") or []
+
+
 # ---------------------------------------------------------------------------
 # Tool: Search for a company ticker
 # ---------------------------------------------------------------------------
 @mcp.tool()
-async def search_company(query: str) -> str:
+async def search_company(query: str, pretty: bool = False) -> str:
     """Search for a company by name to find its ticker symbol.
 
     Uses Yahoo Finance search. Returns matching tickers with names and exchanges.
     Example: search 'Tokio Marine' to find '8766.T'
+    Set pretty=True for indented, human-readable output.
     """
     try:
-        results = yf.Search(query)
+        # yf.Search fetches in its constructor, so build it off the event loop.
+        results = await fetch_once(yf.Search, query)
         quotes = []
         if hasattr(results, "quotes") and results.quotes:
             for q in results.quotes[:10]:
@@ -68,9 +512,9 @@ async def search_company(query: str) -> str:
                     "exchange": q.get("exchange", ""),
                     "type": q.get("quoteType", ""),
                 })
-        return json.dumps(quotes, indent=2)
+        return to_json(quotes, pretty=pretty)
     except Exception as e:
-        return json.dumps({"error": f"Search failed: {str(e)}"})
+        return to_json({"error": f"Search failed: {str(e)}"})
 
 
 # ---------------------------------------------------------------------------
@@ -86,9 +530,10 @@ async def get_company_profile(symbol: str) -> str:
     Use exchange suffixes: .T (Japan), .SW (Swiss), .SI (Singapore),
     .L (UK), .AX (Australia), .DE (Germany), .PA (France), .HK (Hong Kong)
     """
-    info = ticker_info(symbol)
+    symbol = normalize_symbol(symbol)
+    info = await ticker_info(symbol)
     if "error" in info:
-        return json.dumps(info)
+        return to_json(info)
 
     profile = {
         "symbol": symbol,
@@ -98,45 +543,12 @@ async def get_company_profile(symbol: str) -> str:
         "country": info.get("country", ""),
         "currency": info.get("currency", ""),
         "exchange": info.get("exchange", ""),
-        "marketCap": info.get("marketCap"),
         "employees": info.get("fullTimeEmployees"),
         "website": info.get("website", ""),
         "description": info.get("longBusinessSummary", ""),
-        "beta": info.get("beta"),
-        "trailingPE": info.get("trailingPE"),
-        "forwardPE": info.get("forwardPE"),
-        "dividendYield": info.get("dividendYield"),
-        "dividendRate": info.get("dividendRate"),
-        "payoutRatio": info.get("payoutRatio"),
-        "priceToBook": info.get("priceToBook"),
-        "enterpriseValue": info.get("enterpriseValue"),
-        "profitMargins": info.get("profitMargins"),
-        "grossMargins": info.get("grossMargins"),
-        "operatingMargins": info.get("operatingMargins"),
-        "returnOnEquity": info.get("returnOnEquity"),
-        "returnOnAssets": info.get("returnOnAssets"),
-        "debtToEquity": info.get("debtToEquity"),
-        "currentRatio": info.get("currentRatio"),
-        "quickRatio": info.get("quickRatio"),
-        "freeCashflow": info.get("freeCashflow"),
-        "operatingCashflow": info.get("operatingCashflow"),
-        "totalRevenue": info.get("totalRevenue"),
-        "revenueGrowth": info.get("revenueGrowth"),
-        "earningsGrowth": info.get("earningsGrowth"),
-        "targetMeanPrice": info.get("targetMeanPrice"),
-        "recommendationKey": info.get("recommendationKey"),
-        "numberOfAnalystOpinions": info.get("numberOfAnalystOpinions"),
-        "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh"),
-        "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow"),
-        "currentPrice": info.get("currentPrice"),
-        "sharesOutstanding": info.get("sharesOutstanding"),
-        "floatShares": info.get("floatShares"),
-        "heldPercentInsiders": info.get("heldPercentInsiders"),
-        "heldPercentInstitutions": info.get("heldPercentInstitutions"),
-        "shortRatio": info.get("shortRatio"),
-        "shortPercentOfFloat": info.get("shortPercentOfFloat"),
+        **{key: info.get(key) for key in PROFILE_KEYS},
     }
-    return json.dumps(profile, indent=2, default=str)
+    return to_json(profile)
 
 
 # ---------------------------------------------------------------------------
@@ -154,28 +566,19 @@ async def get_income_statement(
 
     Returns revenue, cost of revenue, gross profit, operating income,
     net income, EPS, EBITDA, and more for the last 4 periods.
+
+    Data is columnar: values[i][j] is line item rows[i] for periods[j].
     """
+    symbol = normalize_symbol(symbol)
     try:
-        t = yf.Ticker(symbol)
-        if period == "quarterly":
-            df = t.quarterly_financials
-        else:
-            df = t.financials
-
-        if df is None or df.empty:
-            return json.dumps({"error": f"No income statement data for {symbol}"})
-
-        result = {}
-        for col in df.columns:
-            period_key = col.strftime("%Y-%m-%d")
-            result[period_key] = {}
-            for idx in df.index:
-                val = df.loc[idx, col]
-                result[period_key][idx] = None if str(val) == "nan" else val
-
-        return json.dumps(result, indent=2, default=str)
+        attr = "quarterly_financials" if period == "quarterly" else "financials"
+        text = await cached_json(daily_cache, (attr, symbol), statement_data, symbol, attr)
+        if text is None:
+            return to_json({"error": f"No income statement data for {symbol}"})
+
+        return text
     except Exception as e:
-        return json.dumps({"error": f"Failed: {str(e)}"})
+        return to_json({"error": f"Failed: {str(e)}"})
 
 
 # ---------------------------------------------------------------------------
@@ -190,28 +593,19 @@ async def get_balance_sheet(
     Returns total assets, current assets, cash, total liabilities,
     current liabilities, total debt, total equity, goodwill,
     intangible assets, shares outstanding, and more.
+
+    Data is columnar: values[i][j] is line item rows[i] for periods[j].
     """
+    symbol = normalize_symbol(symbol)
     try:
-        t = yf.Ticker(symbol)
-        if period == "quarterly":
-            df = t.quarterly_balance_sheet
-        else:
-            df = t.balance_sheet
-
-        if df is None or df.empty:
-            return json.dumps({"error": f"No balance sheet data for {symbol}"})
-
-        result = {}
-        for col in df.columns:
-            period_key = col.strftime("%Y-%m-%d")
-            result[period_key] = {}
-            for idx in df.index:
-                val = df.loc[idx, col]
-                result[period_key][idx] = None if str(val) == "nan" else val
-
-        return json.dumps(result, indent=2, default=str)
+        attr = "quarterly_balance_sheet" if period == "quarterly" else "balance_sheet"
+        text = await cached_json(daily_cache, (attr, symbol), statement_data, symbol, attr)
+        if text is None:
+            return to_json({"error": f"No balance sheet data for {symbol}"})
+
+        return text
     except Exception as e:
-        return json.dumps({"error": f"Failed: {str(e)}"})
+        return to_json({"error": f"Failed: {str(e)}"})
 
 
 # ---------------------------------------------------------------------------
@@ -226,28 +620,19 @@ async def get_cash_flow(
     Returns operating cash flow, capital expenditure, free cash flow,
     dividends paid, share repurchases (buybacks), acquisitions,
     debt repayment, and more.
+
+    Data is columnar: values[i][j] is line item rows[i] for periods[j].
     """
+    symbol = normalize_symbol(symbol)
     try:
-        t = yf.Ticker(symbol)
-        if period == "quarterly":
-            df = t.quarterly_cashflow
-        else:
-            df = t.cashflow
-
-        if df is None or df.empty:
-            return json.dumps({"error": f"No cash flow data for {symbol}"})
-
-        result = {}
-        for col in df.columns:
-            period_key = col.strftime("%Y-%m-%d")
-            result[period_key] = {}
-            for idx in df.index:
-                val = df.loc[idx, col]
-                result[period_key][idx] = None if str(val) == "nan" else val
-
-        return json.dumps(result, indent=2, default=str)
+        attr = "quarterly_cashflow" if period == "quarterly" else "cashflow"
+        text = await cached_json(daily_cache, (attr, symbol), statement_data, symbol, attr)
+        if text is None:
+            return to_json({"error": f"No cash flow data for {symbol}"})
+
+        return text
     except Exception as e:
-        return json.dumps({"error": f"Failed: {str(e)}"})
+        return to_json({"error": f"Failed: {str(e)}"})
 
 
 # ---------------------------------------------------------------------------
@@ -261,78 +646,58 @@ async def get_key_metrics(symbol: str) -> str:
     dividend yield, payout ratio, ROE, ROA, profit margins,
     debt/equity, current ratio, free cash flow, and more.
     """
-    info = ticker_info(symbol)
+    symbol = normalize_symbol(symbol)
+    info = await ticker_info(symbol)
     if "error" in info:
-        return json.dumps(info)
+        return to_json(info)
 
     metrics = {
         "symbol": symbol,
         "name": info.get("longName", ""),
         "currency": info.get("currency", ""),
-        "currentPrice": info.get("currentPrice"),
-        "marketCap": info.get("marketCap"),
-        # Valuation
-        "trailingPE": info.get("trailingPE"),
-        "forwardPE": info.get("forwardPE"),
-        "pegRatio": info.get("pegRatio"),
-        "priceToBook": info.get("priceToBook"),
-        "priceToSalesTrailing12Months": info.get("priceToSalesTrailing12Months"),
-        "enterpriseToRevenue": info.get("enterpriseToRevenue"),
-        "enterpriseToEbitda": info.get("enterpriseToEbitda"),
-        "enterpriseValue": info.get("enterpriseValue"),
-        "trailingEps": info.get("trailingEps"),
-        "forwardEps": info.get("forwardEps"),
+        **{key: info.get(key) for key in METRICS_KEYS},
         "earningsYield": round(1 / info["trailingPE"], 4) if info.get("trailingPE") and info["trailingPE"] > 0 else None,
-        # Profitability
-        "grossMargins": info.get("grossMargins"),
-        "operatingMargins": info.get("operatingMargins"),
-        "profitMargins": info.get("profitMargins"),
-        "returnOnEquity": info.get("returnOnEquity"),
-        "returnOnAssets": info.get("returnOnAssets"),
-        # Balance sheet
-        "debtToEquity": info.get("debtToEquity"),
-        "currentRatio": info.get("currentRatio"),
-        "quickRatio": info.get("quickRatio"),
-        "totalDebt": info.get("totalDebt"),
-        "totalCash": info.get("totalCash"),
-        "totalCashPerShare": info.get("totalCashPerShare"),
-        "bookValue": info.get("bookValue"),
-        # Cash flow
-        "freeCashflow": info.get("freeCashflow"),
-        "operatingCashflow": info.get("operatingCashflow"),
-        # Dividends
-        "dividendYield": info.get("dividendYield"),
-        "dividendRate": info.get("dividendRate"),
-        "payoutRatio": info.get("payoutRatio"),
-        "exDividendDate": info.get("exDividendDate"),
-        "lastDividendValue": info.get("lastDividendValue"),
-        "lastDividendDate": info.get("lastDividendDate"),
-        "fiveYearAvgDividendYield": info.get("fiveYearAvgDividendYield"),
-        # Growth
-        "revenueGrowth": info.get("revenueGrowth"),
-        "earningsGrowth": info.get("earningsGrowth"),
-        "earningsQuarterlyGrowth": info.get("earningsQuarterlyGrowth"),
-        "revenueQuarterlyGrowth": info.get("revenueQuarterlyGrowth"),
-        # Revenue
-        "totalRevenue": info.get("totalRevenue"),
-        "revenuePerShare": info.get("revenuePerShare"),
-        # Risk
-        "beta": info.get("beta"),
-        "shortRatio": info.get("shortRatio"),
-        "shortPercentOfFloat": info.get("shortPercentOfFloat"),
-        # Shares
-        "sharesOutstanding": info.get("sharesOutstanding"),
-        "floatShares": info.get("floatShares"),
-        "heldPercentInsiders": info.get("heldPercentInsiders"),
-        "heldPercentInstitutions": info.get("heldPercentInstitutions"),
-        # Analyst
-        "targetMeanPrice": info.get("targetMeanPrice"),
-        "targetHighPrice": info.get("targetHighPrice"),
-        "targetLowPrice": info.get("targetLowPrice"),
-        "recommendationKey": info.get("recommendationKey"),
-        "numberOfAnalystOpinions": info.get("numberOfAnalystOpinions"),
     }
-    return json.dumps(metrics, indent=2, default=str)
+    return to_json(metrics)
+
+
+# ---------------------------------------------------------------------------
+# Tool: Full financials
+# ---------------------------------------------------------------------------
+@mcp.tool()
+async def get_full_financials(
+    symbol: str, period: str = "annual", kinds: str = "income,balance,cashflow,metrics"
+) -> str:
+    """Get income statement, balance sheet, cash flow and key metrics in one call.
+
+    Args:
+        symbol: Stock ticker (e.g. 'AAPL', '8766.T')
+        period: 'annual' or 'quarterly' (applies to the three statements)
+        kinds: Comma-separated parts to include, any of
+            'income', 'balance', 'cashflow', 'metrics' (default: all four)
+
+    The requested parts are fetched concurrently, so this is faster than
+    calling get_income_statement, get_balance_sheet, get_cash_flow and
+    get_key_metrics one after another.
+    """
+    symbol = normalize_symbol(symbol)
+    parts = {
+        "income": ("incomeStatement", functools.partial(get_income_statement, symbol, period)),
+        "balance": ("balanceSheet", functools.partial(get_balance_sheet, symbol, period)),
+        "cashflow": ("cashFlow", functools.partial(get_cash_flow, symbol, period)),
+        "metrics": ("keyMetrics", functools.partial(get_key_metrics, symbol)),
+    }
+    selected = list(dict.fromkeys(k.strip().lower() for k in kinds.split(",") if k.strip()))
+    unknown = [k for k in selected if k not in parts]
+    if unknown or not selected:
+        return to_json({"error": f"Invalid kinds '{kinds}'. Use any of: income, balance, cashflow, metrics"})
+
+    texts = await asyncio.gather(*(parts[k][1]() for k in selected))
+    # Each part is already JSON text (cached or freshly dumped); embed it as-is.
+    return to_json({
+        "symbol": symbol,
+        **{parts[k][0]: orjson.Fragment(text) for k, text in zip(selected, texts)},
+    })
 
 
 # ---------------------------------------------------------------------------
@@ -346,27 +711,15 @@ async def get_dividend_history(symbol: str) -> str:
     Useful for assessing dividend consistency, growth track record,
     and identifying any cuts or freezes.
     """
+    symbol = normalize_symbol(symbol)
     try:
-        t = yf.Ticker(symbol)
-        divs = t.dividends
-
-        if divs is None or divs.empty:
-            return json.dumps({"symbol": symbol, "dividends": [], "message": "No dividend history found"})
-
-        result = {
-            "symbol": symbol,
-            "dividendCount": len(divs),
-            "dividends": []
-        }
-        for date, amount in divs.items():
-            result["dividends"].append({
-                "date": date.strftime("%Y-%m-%d"),
-                "amount": round(float(amount), 6)
-            })
-
-        return json.dumps(result, indent=2)
+        text = await cached_json(daily_cache, ("dividends", symbol), dividend_data, symbol)
     except Exception as e:
-        return json.dumps({"error": f"Failed: {str(e)}"})
+        return to_json({"error": f"Failed: {str(e)}"})
+    # Not cached: yfinance returns no dividends when Yahoo fails, so retry next time.
+    if text is None:
+        return to_json({"symbol": symbol, "dividends": [], "message": "No dividend history found"})
+    return text
 
 
 # ---------------------------------------------------------------------------
@@ -379,35 +732,55 @@ async def get_stock_quote(symbol: str) -> str:
     Returns current price, change, volume, market cap, PE, EPS,
     52-week high/low, dividend yield, and more.
 
-    For multiple stocks, call this tool once per ticker.
+    For multiple stocks, use get_batch_quotes instead.
     """
-    info = ticker_info(symbol)
+    symbol = normalize_symbol(symbol)
+    info = await ticker_info(symbol)
     if "error" in info:
-        return json.dumps(info)
+        return to_json(info)
 
     quote = {
         "symbol": symbol,
         "name": info.get("longName", ""),
         "currency": info.get("currency", ""),
-        "currentPrice": info.get("currentPrice"),
-        "previousClose": info.get("previousClose"),
-        "open": info.get("open"),
-        "dayHigh": info.get("dayHigh"),
-        "dayLow": info.get("dayLow"),
-        "volume": info.get("volume"),
-        "averageVolume": info.get("averageVolume"),
-        "marketCap": info.get("marketCap"),
-        "trailingPE": info.get("trailingPE"),
-        "forwardPE": info.get("forwardPE"),
-        "trailingEps": info.get("trailingEps"),
-        "dividendYield": info.get("dividendYield"),
-        "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh"),
-        "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow"),
-        "fiftyDayAverage": info.get("fiftyDayAverage"),
-        "twoHundredDayAverage": info.get("twoHundredDayAverage"),
-        "sharesOutstanding": info.get("sharesOutstanding"),
+        **{key: info.get(key) for key in QUOTE_KEYS},
     }
-    return json.dumps(quote, indent=2, default=str)
+    return to_json(quote)
+
+
+# ---------------------------------------------------------------------------
+# Tool: Batch stock quotes
+# ---------------------------------------------------------------------------
+@mcp.tool()
+async def get_batch_quotes(symbols: str) -> str:
+    """Get current quotes for several stocks at once.
+
+    Args:
+        symbols: Comma-separated ticker symbols, e.g. 'AAPL,MSFT,8766.T' (max 100)
+
+    Returns the same price fields as get_stock_quote for each symbol, but
+    fetches up to 20 symbols per request, so it is much faster than calling
+    get_stock_quote once per ticker.
+    """
+    tickers = parse_symbols(symbols, limit=100)
+    chunks = [tuple(tickers[i:i + QUOTE_BATCH_SIZE]) for i in range(0, len(tickers), QUOTE_BATCH_SIZE)]
+    try:
+        batches = await asyncio.gather(*(fetch_once(batch_quote_data, chunk) for chunk in chunks))
+    except Exception as e:
+        return to_json({"error": f"Failed: {str(e)}"})
+
+    found = {q.get("symbol"): q for batch in batches for q in batch}
+    results = []
+    for sym in tickers:
+        q = found.get(sym)
+        if q is None:
+            results.append({"symbol": sym, "error": f"No quote found for {sym}"})
+            continue
+        quote = {"symbol": sym, "name": q.get("longName") or q.get("shortName", "")}
+        quote.update({key: q.get(src) for key, src in BATCH_QUOTE_FIELDS})
+        results.append(quote)
+
+    return to_json(results)
 
 
 # ---------------------------------------------------------------------------
@@ -420,30 +793,13 @@ async def get_holders(symbol: str) -> str:
     Returns top institutional holders, top mutual fund holders,
     and insider/institutional ownership percentages.
     """
+    symbol = normalize_symbol(symbol)
     try:
-        t = yf.Ticker(symbol)
-        result = {"symbol": symbol}
-
-        # Major holders summary
-        mh = t.major_holders
-        if mh is not None and not mh.empty:
-            result["majorHolders"] = {}
-            for _, row in mh.iterrows():
-                result["majorHolders"][str(row.iloc[1])] = str(row.iloc[0])
-
-        # Top institutional holders
-        ih = t.institutional_holders
-        if ih is not None and not ih.empty:
-            result["topInstitutionalHolders"] = ih.head(10).to_dict(orient="records")
-
-        # Top mutual fund holders
-        mfh = t.mutualfund_holders
-        if mfh is not None and not mfh.empty:
-            result["topMutualFundHolders"] = mfh.head(10).to_dict(orient="records")
-
-        return json.dumps(result, indent=2, default=str)
+        # All three holder tables come from one quoteSummary request inside
+        # yfinance, so they're read together in one worker-thread call.
+        return to_json(await fetch_once(holders_data, symbol))
     except Exception as e:
-        return json.dumps({"error": f"Failed: {str(e)}"})
+        return to_json({"error": f"Failed: {str(e)}"})
 
 
 # ---------------------------------------------------------------------------
@@ -456,28 +812,38 @@ async def get_analyst_recommendations(symbol: str) -> str:
     Returns recent analyst ratings (buy/hold/sell),
     price target data, and recommendation trends.
     """
+    symbol = normalize_symbol(symbol)
     try:
-        t = yf.Ticker(symbol)
+        # Independent Yahoo requests, so fetch them concurrently.
+        recs, info = await asyncio.gather(
+            fetch_once(recommendations_data, symbol),
+            ticker_info(symbol),
+        )
         result = {"symbol": symbol}
 
-        # Recommendations
-        recs = t.recommendations
-        if recs is not None and not recs.empty:
-            recent = recs.tail(20)
-            result["recommendations"] = recent.to_dict(orient="records")
+        if recs:
+            result["recommendations"] = recs
 
         # Info-based targets
-        info = t.info
-        if info:
+        if "error" not in info:
             result["targetMeanPrice"] = info.get("targetMeanPrice")
             result["targetHighPrice"] = info.get("targetHighPrice")
             result["targetLowPrice"] = info.get("targetLowPrice")
             result["recommendationKey"] = info.get("recommendationKey")
             result["numberOfAnalystOpinions"] = info.get("numberOfAnalystOpinions")
 
-        return json.dumps(result, indent=2, default=str)
+        return to_json(result)
     except Exception as e:
-        return json.dumps({"error": f"Failed: {str(e)}"})
+        return to_json({"error": f"Failed: {str(e)}"})
+
+
+# Values yfinance's history() accepts, after it lowercases them. Anything else
+# only fails after a round trip to Yahoo, so it is rejected before any I/O.
+HISTORY_PERIOD_PATTERN = re.compile(r"[1-9]\d*(d|wk|mo|y)")
+HISTORY_PERIODS = frozenset({"ytd", "max"})
+HISTORY_INTERVALS = frozenset({"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"})
+INVALID_PERIOD_ERROR = to_json({"error": "Invalid period. Use a number followed by d, wk, mo or y (e.g. 5d, 2wk, 6mo, 3y), or ytd, max"})
+INVALID_INTERVAL_ERROR = to_json({"error": "Invalid interval. Use one of: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo"})
 
 
 # ---------------------------------------------------------------------------
@@ -491,38 +857,28 @@ async def get_price_history(
 
     Args:
         symbol: Stock ticker
-        period: '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'max'
+        period: '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max',
+            or any count of d, wk, mo or y (e.g. '3y', '18mo')
         interval: '1d', '1wk', '1mo'
 
     Returns OHLCV data (open, high, low, close, volume) for each period.
     """
+    symbol = normalize_symbol(symbol)
+    period, interval = period.lower(), interval.lower()
+    if period not in HISTORY_PERIODS and not HISTORY_PERIOD_PATTERN.fullmatch(period):
+        return INVALID_PERIOD_ERROR
+    if interval not in HISTORY_INTERVALS:
+        return INVALID_INTERVAL_ERROR
+
     try:
-        t = yf.Ticker(symbol)
-        hist = t.history(period=period, interval=interval)
-
-        if hist is None or hist.empty:
-            return json.dumps({"error": f"No price history for {symbol}"})
-
-        result = {
-            "symbol": symbol,
-            "period": period,
-            "interval": interval,
-            "dataPoints": len(hist),
-            "prices": []
-        }
-        for date, row in hist.iterrows():
-            result["prices"].append({
-                "date": date.strftime("%Y-%m-%d"),
-                "open": round(float(row["Open"]), 4),
-                "high": round(float(row["High"]), 4),
-                "low": round(float(row["Low"]), 4),
-                "close": round(float(row["Close"]), 4),
-                "volume": int(row["Volume"]),
-            })
-
-        return json.dumps(result, indent=2)
+        key = ("history", symbol, period, interval)
+        text = await cached_json(live_cache, key, price_history_data, symbol, period, interval)
+        if text is None:
+            return to_json({"error": f"No price history for {symbol}"})
+
+        return text
     except Exception as e:
-        return json.dumps({"error": f"Failed: {str(e)}"})
+        return to_json({"error": f"Failed: {str(e)}"})
 
 
 # ---------------------------------------------------------------------------
@@ -538,11 +894,11 @@ async def compare_stocks(symbols: str) -> str:
     Returns a side-by-side comparison of PE, dividend yield, ROE, margins,
     debt/equity, beta, market cap, and more for each stock.
     """
-    tickers = [s.strip() for s in symbols.split(",")]
+    tickers = parse_symbols(symbols, limit=10)
+    infos = await asyncio.gather(*(ticker_info_within(sym, 10) for sym in tickers))
     results = []
 
-    for sym in tickers[:10]:  # Max 10 stocks
-        info = ticker_info(sym)
+    for sym, info in zip(tickers, infos):
         if "error" in info:
             results.append({"symbol": sym, "error": info["error"]})
             continue
@@ -551,34 +907,21 @@ async def compare_stocks(symbols: str) -> str:
             "symbol": sym,
             "name": info.get("longName", ""),
             "currency": info.get("currency", ""),
-            "currentPrice": info.get("currentPrice"),
-            "marketCap": info.get("marketCap"),
-            "trailingPE": info.get("trailingPE"),
-            "forwardPE": info.get("forwardPE"),
-            "priceToBook": info.get("priceToBook"),
-            "enterpriseToEbitda": info.get("enterpriseToEbitda"),
-            "dividendYield": info.get("dividendYield"),
-            "payoutRatio": info.get("payoutRatio"),
-            "grossMargins": info.get("grossMargins"),
-            "operatingMargins": info.get("operatingMargins"),
-            "profitMargins": info.get("profitMargins"),
-            "returnOnEquity": info.get("returnOnEquity"),
-            "returnOnAssets": info.get("returnOnAssets"),
-            "debtToEquity": info.get("debtToEquity"),
-            "currentRatio": info.get("currentRatio"),
-            "freeCashflow": info.get("freeCashflow"),
-            "operatingCashflow": info.get("operatingCashflow"),
-            "revenueGrowth": info.get("revenueGrowth"),
-            "earningsGrowth": info.get("earningsGrowth"),
-            "beta": info.get("beta"),
-            "sharesOutstanding": info.get("sharesOutstanding"),
+            **{key: info.get(key) for key in COMPARE_KEYS},
         })
 
-    return json.dumps(results, indent=2, default=str)
+    return to_json(results)
 
 
 # ---------------------------------------------------------------------------
 # Run the server
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
+    # uvloop has no Windows build; fall back to the default asyncio loop there.
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     mcp.run(transport="streamable-http")
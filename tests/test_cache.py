@@ -0,0 +1,58 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+class FlakyTicker:
+    """Stands in for yf.Ticker: .info fails once, then succeeds.
+
+    Like yfinance, it marks .info as fetched before making the request, so
+    a handle whose request failed answers None from then on.
+    """
+
+    requests = 0
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.fetched = False
+
+    @property
+    def info(self):
+        if self.fetched:
+            return None
+        self.fetched = True
+        FlakyTicker.requests += 1
+        if FlakyTicker.requests == 1:
+            raise RuntimeError("Too Many Requests")
+        return {"symbol": self.symbol, "longName": "Apple Inc.", "trailingPegRatio": 2.0}
+
+
+class TransientFailureTest(unittest.TestCase):
+    def setUp(self):
+        self.real_ticker = server.yf.Ticker
+        server.yf.Ticker = FlakyTicker
+        FlakyTicker.requests = 0
+        for cache in (server.live_cache, server.error_cache, server.ticker_handles):
+            cache.clear()
+
+    def tearDown(self):
+        server.yf.Ticker = self.real_ticker
+
+    def test_retry_after_transient_failure_is_not_negative_cached(self):
+        first = asyncio.run(server.ticker_info("AAPL"))
+        self.assertIn("Too Many Requests", first["error"])
+        self.assertEqual(len(server.error_cache), 0)
+
+        second = asyncio.run(server.ticker_info("AAPL"))
+        self.assertEqual(second["longName"], "Apple Inc.")
+        self.assertEqual(FlakyTicker.requests, 2)
+        self.assertEqual(len(server.error_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()